@@ -7,30 +7,162 @@ RegInfo CLI
 
 import os
 import sys
+import time
+import argparse
 import hashlib
 import smtplib
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import json
 import difflib
 import re
-from bs4 import BeautifulSoup
+import xml.etree.ElementTree as ET
 
 
+AGENDAS_CACHE_TTL = 24 * 60 * 60
+
+DIGEST_DIFF_CHARS = 2000
+
+# How much of each changed region, relative to the diff cap, is handed to
+# difflib; a larger window is tried if the first one shows nothing reliable
+DIFF_WINDOW_FACTORS = (4, 16)
+
+DIFF_TOO_LARGE = "(Diff too large to show here - compare the local files)"
+
+# Returned by fetch_rin_xml() in place of the body when the server answers 304 Not Modified
+NOT_MODIFIED = object()
+
+# Agenda downloads are linked as href="...REGINFO_RIN_DATA_<pubid>.xml"
+_PUBID_RE = re.compile(rb'href\s*=\s*["\'][^"\']*REGINFO_RIN_DATA_(\d{6})\.xml', re.IGNORECASE)
+
+# reginfo.gov reports unknown RINs near the top of the response
+_NOT_FOUND_RE = re.compile(rb'not found', re.IGNORECASE)
+NOT_FOUND_SCAN_BYTES = 4096
+
+# Attributes that change on every export, matched case-insensitively
+VOLATILE_ATTRIBUTES = {'run_date', 'rundate', 'timestamp', 'generated'}
+
+# Textual fallback for responses that are not well-formed XML
+_NORMALIZE_RE = re.compile(
+    rb'(?:\s+(?:run_?date|timestamp|generated)=["\'][^"\']*["\'])|(?:<!--.*?-->)',
+    re.IGNORECASE | re.DOTALL
+)
+
+# Notification email bodies, filled in with str.format_map()
+_TEXT_TEMPLATE = """
+RegInfo Monitor Alert
+=========================
+
+RIN: {rin}
+Change: {old_pubid} -> {new_pubid}
+Time: {time}
+
+View XML:
+Previous: {old_url}
+Current: {new_url}
+
+Changes (first 5000 chars):
+--------------------------------------------------
+{diff_text}
+--------------------------------------------------
+
+Local files:
+Previous: {old_file}
+Current: {new_file}
+"""
+
+_HTML_TEMPLATE = """
+<html>
+<body>
+    <h2>RegInfo Monitor Alert</h2>
+    <h3>RIN: {rin}</h3>
+    <table style="background: #f4f4f4; padding: 15px;">
+        <tr><td><strong>Previous:</strong></td><td>{old_pubid}</td></tr>
+        <tr><td><strong>Current:</strong></td><td>{new_pubid}</td></tr>
+        <tr><td><strong>Time:</strong></td><td>{time}</td></tr>
+    </table>
+    <h3>View XML:</h3>
+    <ul>
+        <li><a href="{old_url}">Previous ({old_pubid})</a></li>
+        <li><a href="{new_url}">Current ({new_pubid})</a></li>
+    </ul>
+    <h3>Changes:</h3>
+    <pre style="background: #f4f4f4; padding: 10px; font-size: 11px;">
+{diff_text}
+    </pre>
+</body>
+</html>
+"""
+
+_DIGEST_TEXT_TEMPLATE = """
+RegInfo Monitor Alert
+=========================
+
+{count} RINs changed
+Time: {time}
+{sections}"""
+
+_DIGEST_TEXT_SECTION = """
+RIN: {rin}
+Change: {old_pubid} -> {new_pubid}
+Previous: {old_url}
+Current: {new_url}
+
+Changes (first {diff_chars} chars):
+--------------------------------------------------
+{diff_text}
+--------------------------------------------------
+
+Local files:
+Previous: {old_file}
+Current: {new_file}
+"""
+
+_DIGEST_HTML_TEMPLATE = """
+<html>
+<body>
+    <h2>RegInfo Monitor Alert</h2>
+    <p>{count} RINs changed at {time}</p>
+{sections}
+</body>
+</html>
+"""
+
+_DIGEST_HTML_SECTION = """
+    <h3>RIN: {rin}</h3>
+    <table style="background: #f4f4f4; padding: 15px;">
+        <tr><td><strong>Previous:</strong></td><td><a href="{old_url}">{old_pubid}</a></td></tr>
+        <tr><td><strong>Current:</strong></td><td><a href="{new_url}">{new_pubid}</a></td></tr>
+    </table>
+    <pre style="background: #f4f4f4; padding: 10px; font-size: 11px;">
+{diff_text}
+    </pre>
+"""
+
 
 
 
 
 class RINMonitor:
-    def __init__(self, config_file='config.json'):
+    def __init__(self, config_file='config.json', refresh_agendas=False):
 
         self.config_file = config_file
+        self.refresh_agendas = refresh_agendas
         self.config = self.load_config()
         self.data_dir = Path(self.config.get('data_directory', 'reginfo_data'))
         self.data_dir.mkdir(exist_ok=True)
+        self._agendas_cache = None
+        self.agendas_cache_file = self.data_dir / '_agendas.json'
+        self.http_cache_file = self.data_dir / '_http_cache.json'
+        self._http_cache = self.load_http_cache()
+        self.session = self.create_session()
+        self._smtp = None
 
 
 
@@ -71,33 +203,63 @@ class RINMonitor:
 
 
 
+    def create_session(self):
+
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.config.get('concurrency', 8),
+            max_retries=Retry(total=3, backoff_factor=0.3)
+        )
+        session.mount('https://', adapter)
+        session.headers['Accept-Encoding'] = 'gzip, deflate'
+        return session
+
     def get_available_agendas(self):
 
+        if self._agendas_cache is None:
+            pubids = None if self.refresh_agendas else self.load_agendas_cache()
+            if pubids is None:
+                pubids = self._fetch_available_agendas()
+            self._agendas_cache = pubids
+        return self._agendas_cache
+
+    def load_agendas_cache(self):
+
         try:
-            url = "https://www.reginfo.gov/public/do/eAgendaXmlReport"
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            pubids = set()
-            
+            if time.time() - self.agendas_cache_file.stat().st_mtime >= AGENDAS_CACHE_TTL:
+                return None
+            with open(self.agendas_cache_file, 'r') as f:
+                return json.load(f) or None
+        except (OSError, ValueError):
+            return None
 
+    def save_agendas_cache(self, pubids):
 
+        try:
+            with open(self.agendas_cache_file, 'w') as f:
+                json.dump(pubids, f)
+        except OSError as e:
+            print(f"Could not save agenda cache: {e}")
 
+    def _fetch_available_agendas(self):
 
-            nav_links = soup.find_all('a', class_='pageSubNav')
-            for link in nav_links:
-                href = link.get('href', '')
-                match = re.search(r'REGINFO_RIN_DATA_(\d{6})\.xml', href)
-                if match:
-                    pubid = match.group(1)
-                    if len(pubid) == 6 and pubid.endswith(('04', '10')):
-                        year = int(pubid[:4])
-                        if 2020 <= year <= 2030:
-                            pubids.add(pubid)
+        try:
+            url = "https://www.reginfo.gov/public/do/eAgendaXmlReport"
+            response = self.session.get(url, timeout=30)
+            response.raise_for_status()
+            
+            pubids = set()
+            for match in _PUBID_RE.finditer(response.content):
+                pubid = match.group(1).decode('ascii')
+                if pubid.endswith(('04', '10')):
+                    year = int(pubid[:4])
+                    if 2020 <= year <= 2030:
+                        pubids.add(pubid)
             
             if pubids:
                 sorted_pubids = sorted(list(pubids), reverse=True)
+                self.save_agendas_cache(sorted_pubids)
                 return sorted_pubids
             else:
                 return self.generate_default_pubids()
@@ -115,16 +277,67 @@ class RINMonitor:
 
 
 
+    def load_http_cache(self):
+
+        try:
+            with open(self.http_cache_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_http_cache(self):
+
+        try:
+            with open(self.http_cache_file, 'w') as f:
+                json.dump(self._http_cache, f, indent=2)
+        except OSError as e:
+            print(f"Could not save HTTP cache: {e}")
+
+    def get_conditional_headers(self, rin, pubid):
+
+        # Validators are only useful if we still hold a saved copy of that export
+        entry = self._http_cache.get(rin)
+        if not entry or entry.get('pubid') != pubid:
+            return {}
+        
+        previous_pubid, _ = self.get_latest_file_for_rin(rin)
+        if previous_pubid != pubid:
+            return {}
+        
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def record_validators(self, rin, pubid, validators):
+
+        if validators and (validators['etag'] or validators['last_modified']):
+            self._http_cache[rin] = dict(validators, pubid=pubid)
+        else:
+            self._http_cache.pop(rin, None)
+
+    # Returns (content, validators, error). This runs on worker threads, so it
+    # doesn't print; process_rin_xml() reports errors in RIN order. The
+    # validators are only recorded once the body has been saved, so a 304
+    # always refers to an export we hold a copy of.
     def fetch_rin_xml(self, rin, pubid):
 
         url = self.build_rin_xml_url(rin, pubid)
         try:
-            response = requests.get(url, timeout=30)
+            response = self.session.get(url, headers=self.get_conditional_headers(rin, pubid), timeout=30)
+            if response.status_code == 304:
+                return NOT_MODIFIED, None, None
             response.raise_for_status()
-            return response.text
         except requests.RequestException as e:
-            print(f"  Error fetching XML: {e}")
-            return None
+            return None, None, e
+        
+        validators = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+        }
+        return response.content, validators, None
            
 
 
@@ -137,21 +350,25 @@ class RINMonitor:
 
     def normalize_xml_for_comparison(self, content):
 
-        content = re.sub(r'\s+RUN_DATE=["\'][^"\']*["\']', '', content)
-        content = re.sub(r'\s+run_date=["\'][^"\']*["\']', '', content, flags=re.IGNORECASE)
-        
-        content = re.sub(r'\s+RUNDATE=["\'][^"\']*["\']', '', content)
-        content = re.sub(r'\s+rundate=["\'][^"\']*["\']', '', content, flags=re.IGNORECASE)
+        try:
+            root = ET.fromstring(content)
+        except ET.ParseError:
+            return _NORMALIZE_RE.sub(b'', content)
         
-        content = re.sub(r'\s+timestamp=["\'][^"\']*["\']', '', content, flags=re.IGNORECASE)
-        content = re.sub(r'\s+generated=["\'][^"\']*["\']', '', content, flags=re.IGNORECASE)
-        content = re.sub(r'<!--.*?-->', '', content, flags=re.DOTALL)
+        # The parser already drops comments; strip volatile attributes structurally
+        for element in root.iter():
+            volatile = [name for name in element.attrib if name.lower() in VOLATILE_ATTRIBUTES]
+            for name in volatile:
+                del element.attrib[name]
         
-        return content
+        return ET.tostring(root, encoding='utf-8')
     
-    def get_content_hash(self, content):
+    def normalize_and_hash(self, content):
         normalized = self.normalize_xml_for_comparison(content)
-        return hashlib.md5(normalized.encode('utf-8')).hexdigest()
+        return normalized, hashlib.blake2b(normalized, digest_size=16).hexdigest()
+
+    def get_content_hash(self, content):
+        return self.normalize_and_hash(content)[1]
     
 
 
@@ -168,8 +385,7 @@ class RINMonitor:
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         filename = rin_dir / f"rin_{rin}_{pubid}_{timestamp}.xml"
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(content)
+        filename.write_bytes(content)
         
 
 
@@ -191,23 +407,30 @@ class RINMonitor:
 
 
 
-    def cleanup_old_files(self, rin, keep_count=2):
+    # Saved files are named rin_<RIN>_<pubid>_<YYYYMMDD_HHMMSS>.xml, so for a
+    # given RIN sorting by name is the same as sorting by age.
+    def list_rin_files(self, rin):
         rin_dir = self.data_dir / rin
         
         if not rin_dir.exists():
-            return
+            return []
         
-        pattern = f"rin_{rin}_*.xml"
-        files = sorted(rin_dir.glob(pattern), key=lambda f: f.stat().st_mtime, reverse=True)
+        prefix = f"rin_{rin}_"
+        with os.scandir(rin_dir) as it:
+            return [e for e in it if e.name.startswith(prefix) and e.name.endswith('.xml')]
+
+    def cleanup_old_files(self, rin, keep_count=2):
+        entries = self.list_rin_files(rin)
+        entries.sort(key=lambda e: e.name, reverse=True)
         
-        files_to_delete = files[keep_count:]
+        files_to_delete = entries[keep_count:]
         
-        for file_path in files_to_delete:
+        for entry in files_to_delete:
             try:
-                file_path.unlink()
-                print(f"    Deleted old file: {file_path.name}")
+                os.unlink(entry.path)
+                print(f"    Deleted old file: {entry.name}")
             except Exception as e:
-                print(f"    Error deleting {file_path.name}: {e}")
+                print(f"    Error deleting {entry.name}: {e}")
     
 
 
@@ -215,22 +438,15 @@ class RINMonitor:
 
 
     def get_latest_file_for_rin(self, rin):
-        rin_dir = self.data_dir / rin
-        
-        if not rin_dir.exists():
-            return None, None
+        entries = self.list_rin_files(rin)
         
-        pattern = f"rin_{rin}_*.xml"
-        files = sorted(rin_dir.glob(pattern), reverse=True)
-        
-        if not files:
+        if not entries:
             return None, None
         
-        latest_file = files[0]
-        match = re.search(r'rin_[^_]+_(\d{6})_', latest_file.name)
-        if match:
-            pubid = match.group(1)
-            return pubid, latest_file
+        latest_file = Path(max(entries, key=lambda e: e.name).path)
+        parts = latest_file.name.split('_')
+        if len(parts) >= 4 and len(parts[2]) == 6 and parts[2].isdigit():
+            return parts[2], latest_file
         
         return None, latest_file
     
@@ -241,27 +457,142 @@ class RINMonitor:
 
 
 
-    def compare_xml(self, old_content, new_content):
+    def compare_xml(self, old_content, new_content, max_chars=6000):
         old_normalized = self.normalize_xml_for_comparison(old_content)
         new_normalized = self.normalize_xml_for_comparison(new_content)
-        
+        return self.compare_normalized(old_normalized, new_normalized, max_chars)
+
+    def get_changed_region(self, old_lines, new_lines, context=3):
+        limit = min(len(old_lines), len(new_lines))
+        
+        prefix = 0
+        while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+            prefix += 1
+        
+        suffix = 0
+        while suffix < limit - prefix and old_lines[-1 - suffix] == new_lines[-1 - suffix]:
+            suffix += 1
+        
+        # Keep the context lines unified_diff would show around the change
+        start = max(prefix - context, 0)
+        suffix = max(suffix - context, 0)
+        return start, len(old_lines) - suffix, len(new_lines) - suffix
+
+    def get_diff_window(self, lines, start, end, max_bytes):
+        window = []
+        total_len = 0
+        for line in lines[start:end]:
+            if total_len >= max_bytes:
+                return window, True
+            window.append(line)
+            total_len += len(line)
+        return window, False
+
+    def compare_normalized(self, old_normalized, new_normalized, max_chars=6000):
         old_lines = old_normalized.splitlines(keepends=True)
         new_lines = new_normalized.splitlines(keepends=True)
         
-        diff = list(difflib.unified_diff(
-            old_lines, 
-            new_lines,
-            fromfile='Previous',
-            tofile='Current',
-            lineterm=''
-        ))
-        
-        return ''.join(diff)
-    
-
-
-
-
+        # difflib matches its whole input before yielding the first line, so
+        # a large changed region is only diffed in windows sized to the cap.
+        start, old_end, new_end = self.get_changed_region(old_lines, new_lines)
+        for factor in DIFF_WINDOW_FACTORS:
+            window_bytes = max_chars * factor
+            old_window, old_capped = self.get_diff_window(old_lines, start, old_end, window_bytes)
+            new_window, new_capped = self.get_diff_window(new_lines, start, new_end, window_bytes)
+            
+            if not old_capped and not new_capped:
+                diff = difflib.diff_bytes(
+                    difflib.unified_diff,
+                    old_lines, 
+                    new_lines,
+                    fromfile=b'Previous',
+                    tofile=b'Current',
+                    lineterm=b''
+                )
+                return self.join_diff(diff, max_chars)
+            
+            diff = self.windowed_diff(old_window, new_window, start, old_capped, new_capped)
+            if diff:
+                return self.join_diff(diff, max_chars)
+        
+        return DIFF_TOO_LARGE
+
+    def windowed_diff(self, old_window, new_window, offset, old_capped, new_capped):
+        matcher = difflib.SequenceMatcher(None, old_window, new_window)
+        diff = []
+        for group in matcher.get_grouped_opcodes(3):
+            # An opcode running into a capped window edge may pair up lines
+            # that are not really related, so nothing from there on is shown.
+            kept = []
+            for opcode in group:
+                tag, i1, i2, j1, j2 = opcode
+                if (old_capped and i2 >= len(old_window)) or (new_capped and j2 >= len(new_window)):
+                    break
+                kept.append(opcode)
+            
+            truncated = len(kept) < len(group)
+            if not any(tag != 'equal' for tag, _, _, _, _ in kept):
+                break
+            
+            if not diff:
+                diff = [b'--- Previous', b'+++ Current']
+            first, last = kept[0], kept[-1]
+            diff.append(b'@@ -%s +%s @@' % (
+                self._format_hunk_range(first[1] + offset, last[2] + offset),
+                self._format_hunk_range(first[3] + offset, last[4] + offset)
+            ))
+            for tag, i1, i2, j1, j2 in kept:
+                if tag == 'equal':
+                    diff.extend(b' ' + line for line in old_window[i1:i2])
+                    continue
+                if tag in ('replace', 'delete'):
+                    diff.extend(b'-' + line for line in old_window[i1:i2])
+                if tag in ('replace', 'insert'):
+                    diff.extend(b'+' + line for line in new_window[j1:j2])
+            
+            if truncated:
+                break
+        return diff
+
+    def _format_hunk_range(self, start, stop):
+        # Same convention as difflib.unified_diff
+        length = stop - start
+        if length == 1:
+            return b'%d' % (start + 1)
+        if not length:
+            return b'%d,0' % start
+        return b'%d,%d' % (start + 1, length)
+
+    def join_diff(self, diff, max_chars):
+        # Notifications only show the start of the diff, so stop generating
+        # it once there is enough text, and decode just that part.
+        chunks = []
+        total_len = 0
+        for line in diff:
+            chunks.append(line)
+            total_len += len(line)
+            if total_len >= max_chars:
+                break
+        
+        return b''.join(chunks).decode('utf-8', errors='replace')
+
+
+
+
+
+    def build_change_context(self, change, diff_chars):
+
+        return {
+            'rin': change['rin'],
+            'old_pubid': change['old_pubid'],
+            'new_pubid': change['new_pubid'],
+            'old_url': self.build_rin_xml_url(change['rin'], change['old_pubid']),
+            'new_url': self.build_rin_xml_url(change['rin'], change['new_pubid']),
+            'diff_text': change['diff_text'][:diff_chars],
+            'diff_chars': diff_chars,
+            'old_file': change['old_file'],
+            'new_file': change['new_file'],
+        }
 
     def send_email_notification(self, rin, old_pubid, new_pubid, diff_text, old_file, new_file):
         smtp_config = self.config['email']
@@ -275,117 +606,145 @@ class RINMonitor:
         msg['From'] = smtp_config['from_address']
         msg['To'] = smtp_config['to_address']
         
-
-
-
-
-
-
-
-
-        text_content = f"""
-RegInfo Monitor Alert
-=========================
-
-RIN: {rin}
-Change: {old_pubid} -> {new_pubid}
-Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-View XML:
-Previous: https://www.reginfo.gov/public/do/eAgendaViewRule?pubId={old_pubid}&RIN={rin}&operation=OPERATION_EXPORT_XML
-Current: https://www.reginfo.gov/public/do/eAgendaViewRule?pubId={new_pubid}&RIN={rin}&operation=OPERATION_EXPORT_XML
-
-Changes (first 5000 chars):
-{'-' * 50}
-{diff_text[:5000]}
-{'-' * 50}
-
-Local files:
-Previous: {old_file}
-Current: {new_file}
-"""
+        ctx = self.build_change_context({
+            'rin': rin,
+            'old_pubid': old_pubid,
+            'new_pubid': new_pubid,
+            'diff_text': diff_text,
+            'old_file': old_file,
+            'new_file': new_file,
+        }, 5000)
+        ctx['time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
-        html_content = f"""
-<html>
-<body>
-    <h2>RegInfo Monitor Alert</h2>
-    <h3>RIN: {rin}</h3>
-    <table style="background: #f4f4f4; padding: 15px;">
-        <tr><td><strong>Previous:</strong></td><td>{old_pubid}</td></tr>
-        <tr><td><strong>Current:</strong></td><td>{new_pubid}</td></tr>
-        <tr><td><strong>Time:</strong></td><td>{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</td></tr>
-    </table>
-    <h3>View XML:</h3>
-    <ul>
-        <li><a href="https://www.reginfo.gov/public/do/eAgendaViewRule?pubId={old_pubid}&RIN={rin}&operation=OPERATION_EXPORT_XML">Previous ({old_pubid})</a></li>
-        <li><a href="https://www.reginfo.gov/public/do/eAgendaViewRule?pubId={new_pubid}&RIN={rin}&operation=OPERATION_EXPORT_XML">Current ({new_pubid})</a></li>
-    </ul>
-    <h3>Changes:</h3>
-    <pre style="background: #f4f4f4; padding: 10px; font-size: 11px;">
-{diff_text[:5000]}
-    </pre>
-</body>
-</html>
-"""
+        msg.attach(MIMEText(_TEXT_TEMPLATE.format_map(ctx), 'plain'))
+        msg.attach(MIMEText(_HTML_TEMPLATE.format_map(ctx), 'html'))
         
+        return self._send_message(msg)
 
+    def send_digest_notification(self, changes):
+        smtp_config = self.config['email']
+        
+        if not smtp_config.get('username') or not smtp_config.get('password'):
+            print("    Email not configured - skipping notification")
+            return False
+        
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = f'RegInfo: {len(changes)} RIN Changes'
+        msg['From'] = smtp_config['from_address']
+        msg['To'] = smtp_config['to_address']
+        
+        contexts = [self.build_change_context(change, DIGEST_DIFF_CHARS) for change in changes]
+        text_ctx = {
+            'count': len(changes),
+            'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'sections': ''.join(_DIGEST_TEXT_SECTION.format_map(ctx) for ctx in contexts),
+        }
+        html_ctx = dict(text_ctx, sections=''.join(_DIGEST_HTML_SECTION.format_map(ctx) for ctx in contexts))
+        
+        msg.attach(MIMEText(_DIGEST_TEXT_TEMPLATE.format_map(text_ctx), 'plain'))
+        msg.attach(MIMEText(_DIGEST_HTML_TEMPLATE.format_map(html_ctx), 'html'))
+        
+        return self._send_message(msg)
 
+    def notify_changes(self, changes):
 
+        if len(changes) == 1:
+            return self.send_email_notification(**changes[0])
+        if changes:
+            return self.send_digest_notification(changes)
+        return False
 
-
-
-
-        
-        part1 = MIMEText(text_content, 'plain')
-        part2 = MIMEText(html_content, 'html')
-        msg.attach(part1)
-        msg.attach(part2)
+    def _send_message(self, msg):
+        smtp_config = self.config['email']
         
         try:
-            with smtplib.SMTP(smtp_config['smtp_server'], smtp_config['smtp_port']) as server:
-                server.starttls()
-                server.login(smtp_config['username'], smtp_config['password'])
-                server.send_message(msg)
+            self._get_smtp().send_message(msg)
             print(f"Email sent to {smtp_config['to_address']}")
             return True
         except Exception as e:
             print(f"Email error: {e}")
+            self._close_smtp()
             return False
-    
-    def monitor_rin(self, rin):
-        print(f"\n  Checking RIN: {rin}")
-        
-
 
+    def _get_smtp(self):
 
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._close_smtp()
+        
+        smtp_config = self.config['email']
+        server = smtplib.SMTP(smtp_config['smtp_server'], smtp_config['smtp_port'])
+        try:
+            server.starttls()
+            server.login(smtp_config['username'], smtp_config['password'])
+        except Exception:
+            server.close()
+            raise
+        self._smtp = server
+        return server
 
+    def _close_smtp(self):
 
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self._smtp.close()
+        self._smtp = None
+    
+    def get_latest_pubid(self):
 
         available_pubids = self.get_available_agendas()
         if not available_pubids:
             print("Could not determine available agendas")
-            return False
+            return None
         
         latest_pubid = available_pubids[0]
         print(f"Latest agenda: {latest_pubid}")
-        
-
-
+        return latest_pubid
 
+    def monitor_rin(self, rin):
+        latest_pubid = self.get_latest_pubid()
+        if not latest_pubid:
+            return None
+        
+        current_xml, validators, error = self.fetch_rin_xml(rin, latest_pubid)
+        change = self.process_rin_xml(rin, latest_pubid, current_xml, validators, error)
+        self.save_http_cache()
+        if change:
+            try:
+                self.notify_changes([change])
+            finally:
+                self._close_smtp()
+        return change
 
-        current_xml = self.fetch_rin_xml(rin, latest_pubid)
+    def process_rin_xml(self, rin, latest_pubid, current_xml, validators=None, error=None):
+        print(f"\n  Checking RIN: {rin}")
+        
+        if current_xml is NOT_MODIFIED:
+            print(f"No changes detected (not modified since last fetch)")
+            return None
+        
         if not current_xml:
-            print(f"Failed to fetch XML")
-            return False
+            if error:
+                print(f"Failed to fetch XML for {rin}: {error}")
+            else:
+                print(f"Failed to fetch XML for {rin}")
+            return None
         
 
 
 
 
 
-        if "not found" in current_xml.lower() or len(current_xml) < 100:
+        if len(current_xml) < 100 or _NOT_FOUND_RE.search(current_xml, 0, NOT_FOUND_SCAN_BYTES):
             print(f"RIN not found in agenda {latest_pubid}")
-            return False
+            return None
         
 
 
@@ -398,31 +757,43 @@ Current: {new_file}
 
         if previous_file:
 
-            with open(previous_file, 'r', encoding='utf-8') as f:
-                previous_xml = f.read()
+            previous_xml = previous_file.read_bytes()
             
-            current_hash = self.get_content_hash(current_xml)
-            previous_hash = self.get_content_hash(previous_xml)
+            # Identical bytes need no normalization; only hash when they differ
+            if previous_xml == current_xml:
+                changed = False
+            else:
+                current_normalized, current_hash = self.normalize_and_hash(current_xml)
+                previous_normalized, previous_hash = self.normalize_and_hash(previous_xml)
+                changed = current_hash != previous_hash
             
-            if current_hash != previous_hash:
+            if changed:
 
                 print(f"CHANGE DETECTED: {previous_pubid} -> {latest_pubid}")
                 
                 new_file = self.save_rin_xml(rin, latest_pubid, current_xml)
-                diff = self.compare_xml(previous_xml, current_xml)
+                self.record_validators(rin, latest_pubid, validators)
+                diff = self.compare_normalized(previous_normalized, current_normalized)
                 
-
-                self.send_email_notification(rin, previous_pubid, latest_pubid, diff, previous_file, new_file)
-                return True
+                return {
+                    'rin': rin,
+                    'old_pubid': previous_pubid,
+                    'new_pubid': latest_pubid,
+                    'diff_text': diff,
+                    'old_file': previous_file,
+                    'new_file': new_file,
+                }
             else:
                 print(f"No changes detected")
                 self.save_rin_xml(rin, latest_pubid, current_xml)
-                return False
+                self.record_validators(rin, latest_pubid, validators)
+                return None
         else:
             # First run - baseline
             print(f"Saving baseline for agenda {latest_pubid}")
             self.save_rin_xml(rin, latest_pubid, current_xml)
-            return False
+            self.record_validators(rin, latest_pubid, validators)
+            return None
     
 
 
@@ -441,13 +812,35 @@ Current: {new_file}
         
         print(f"Monitoring {len(rins)} RIN(s)")
         
-        changes = 0
-        for rin in rins:
-            if self.monitor_rin(rin):
-                changes += 1
+        latest_pubid = self.get_latest_pubid()
+        if not latest_pubid:
+            return
+        
+        # Fetches are network-bound, so run them in parallel; comparing,
+        # saving and notifying stay on the main thread.
+        changes = []
+        max_workers = self.config.get('concurrency', 8)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                rin: executor.submit(self.fetch_rin_xml, rin, latest_pubid)
+                for rin in rins
+            }
+            # Process in config order so logs and digests are stable between runs
+            for rin, future in futures.items():
+                current_xml, validators, error = future.result()
+                change = self.process_rin_xml(rin, latest_pubid, current_xml, validators, error)
+                if change:
+                    changes.append(change)
+        self.save_http_cache()
+        
+        # Several changes in one run go out as a single digest email
+        try:
+            self.notify_changes(changes)
+        finally:
+            self._close_smtp()
         
         print("\n" + "=" * 60)
-        print(f"Complete: {changes} change(s) detected")
+        print(f"Complete: {len(changes)} change(s) detected")
         print(f"Finished: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print("=" * 60)
 
@@ -459,7 +852,12 @@ Current: {new_file}
 
 
 def main():
-    monitor = RINMonitor()
+    parser = argparse.ArgumentParser(description='Monitor RINs via RegInfo.gov XML exports')
+    parser.add_argument('--refresh-agendas', action='store_true',
+                        help='ignore the cached agenda list and fetch it from RegInfo.gov')
+    args = parser.parse_args()
+    
+    monitor = RINMonitor(refresh_agendas=args.refresh_agendas)
     monitor.run()
 
 
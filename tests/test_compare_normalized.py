@@ -0,0 +1,58 @@
+import difflib
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from rin_monitor_cli import RINMonitor
+
+
+def full_diff(old, new, max_chars=6000):
+    lines = difflib.diff_bytes(
+        difflib.unified_diff,
+        old.splitlines(keepends=True),
+        new.splitlines(keepends=True),
+        fromfile=b'Previous',
+        tofile=b'Current',
+        lineterm=b''
+    )
+    chunks = []
+    total_len = 0
+    for line in lines:
+        chunks.append(line)
+        total_len += len(line)
+        if total_len >= max_chars:
+            break
+    return b''.join(chunks).decode('utf-8')
+
+
+class CompareNormalizedTest(unittest.TestCase):
+    def setUp(self):
+        # compare_normalized() needs no config or data directory
+        self.monitor = RINMonitor.__new__(RINMonitor)
+
+    def test_small_change_matches_unified_diff(self):
+        old = [b'<line n="%d">value %d</line>\n' % (i, i) for i in range(50)]
+        new = list(old)
+        new[20] = b'<line n="20">changed</line>\n'
+        old, new = b''.join(old), b''.join(new)
+
+        self.assertEqual(self.monitor.compare_normalized(old, new), full_diff(old, new))
+
+    def test_large_insertion_with_distant_change(self):
+        old = [b'<line n="%d">value %d</line>\n' % (i, i) for i in range(2000)]
+        new = old[:10] + [b'<line n="ins%d">new %d</line>\n' % (i, i) for i in range(1000)] + old[10:]
+        new[1010 + 1900] = b'<line n="1900">changed</line>\n'
+        old, new = b''.join(old), b''.join(new)
+
+        diff = self.monitor.compare_normalized(old, new)
+
+        # Only the insertion lies within the cap; no line may be reported deleted
+        body = diff.split('\n')[1:]
+        self.assertFalse([line for line in body if line.startswith('-')])
+        self.assertTrue(full_diff(old, new).startswith(diff))
+
+
+if __name__ == '__main__':
+    unittest.main()